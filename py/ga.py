@@ -4,8 +4,10 @@ sys.path.append('./py')
 
 from numbers import Number
 
+import numpy as np
+
 from vector import Vector
-from multivector import MultiVector
+from multivector import MultiVector, _pseudoscalar
 
 class GA:
     """GA(n) -> the rank-n geometric algebra with floating point coefficients
@@ -22,10 +24,21 @@ class GA:
     of this geometric algebra.  The quantities above produced by GA's
     factory methods are instances of a MultiVector class.
 
+    There is one GA instance per rank:
+    >>> GA(3) is ga
+    True
+
     """
-    
-    def __init__(self, n):
-        self._dim = n
+
+    _instances = {}
+
+    def __new__(cls, n):
+        ga = cls._instances.get(n)
+        if ga is None:
+            ga = super().__new__(cls)
+            ga._dim = n
+            cls._instances[n] = ga
+        return ga
 
     @property
     def n(self):
@@ -45,27 +58,31 @@ this algebra's rank.
 
         """
         x = MultiVector(self.n)
-        for i in range(2**m.dim):
-            if m[i]:
-                x[i] = m[i]
+        k = min(len(x._data), len(m._data))
+        if m._data[k:].any():
+            raise IndexError(k + int(np.flatnonzero(m._data[k:])[0]))
+        x._data[:k] = m._data[:k]
         return x
 
     def blade(self, coef, *indices):
         """Create a blade in this algebra.  See the __getitem__ method for a
 better interface."""
-        x = self.scalar(coef)
+        bits = 0
+        sign = 1.0
+        rank = MultiVector._rank
         for i in indices:
-            y = MultiVector(self.n)
-            y[2**(i-1)] = 1.0
-            x *= y
+            # e_i moves past the basis vectors of the blade so far above it
+            if rank(bits >> i) & 1:
+                sign = -sign
+            bits ^= 1 << (i-1)
+        x = MultiVector(self.n)
+        x[bits] = sign * coef
         return x
 
     @property
     def I(self):
         """Return the standard pseudoscalar for this algebra."""
-        x = MultiVector(self.n)
-        x[-1] = 1.0
-        return x
+        return MultiVector._wrap(self.n, _pseudoscalar(self.n).copy())
     
     def __getitem__(self, index):
         """Create a blade for this algebra.  The index can be an integer or a
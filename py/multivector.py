@@ -2,16 +2,176 @@
 import sys
 sys.path.append('./py')
 
+import functools
 import math
 from numbers import Number
 
+import numpy as np
+
+
+# exact types checked before the (slower) Number ABC in hot operations
+_NUMBER = (int, float)
+
+# above this dim the (2**dim, 2**dim) sign tables are too big to cache, and
+# products compute the signs of just the pairs of nonzero terms instead
+_TABLE_DIM = 8
+
+
+@functools.lru_cache(maxsize=None)
+def _popcnt(dim):
+    """Return the array of grades (Hamming weights) of the standard basis
+    blades 0, 1, ..., 2**dim - 1.  The array is shared and must not be
+    modified.
+    """
+    rank = MultiVector._rank
+    ranks = np.array([rank(i) for i in range(1 << dim)], dtype=np.int8)
+    ranks.flags.writeable = False
+    return ranks
+
+
+@functools.lru_cache(maxsize=None)
+def _cayley(dim):
+    """Return the multiplication table (K, S) of GA(dim) as a pair of
+    (2**dim, 2**dim) arrays, such that the product of the standard basis
+    blades i and j is S[i, j] times the standard basis blade K[i, j].
+
+    The table depends only on dim, so it is built once and cached.  The
+    arrays are shared and must not be modified.
+    """
+    blades = np.arange(1 << dim)
+    ranks = _popcnt(dim)
+    K = np.bitwise_xor.outer(blades, blades).astype(np.int32)
+    # as in _blade_combine, each basis vector of j moves past the basis
+    # vectors of i above it
+    swaps = np.zeros(K.shape, dtype=np.int32)
+    for p in range(dim):
+        swaps += np.outer(ranks[blades >> (p + 1)], (blades >> p) & 1)
+    S = np.where(swaps & 1, -1, 1).astype(np.int8)
+    K.flags.writeable = False
+    S.flags.writeable = False
+    return K, S
+
+
+def _blade_signs(a, b):
+    """Return the int8 array of signs s such that the product of the
+    standard basis blades a and b (integer arrays, broadcast together) is
+    s times the blade a ^ b.  This is _blade_combine without the tables.
+    """
+    # each basis vector of b moves past the basis vectors of a above it,
+    # and only the parity of the count matters, so XOR the overlaps of b
+    # with each shift of a and take the parity of the result
+    a = np.asarray(a)
+    t = np.zeros(np.broadcast(a, b).shape, dtype=np.int64)
+    a = a >> 1
+    while a.any():
+        t ^= a & b
+        a = a >> 1
+    shift = 32
+    while shift:
+        t ^= t >> shift
+        shift >>= 1
+    return (1 - 2*(t & 1)).astype(np.int8)
+
+
+def _gather(table, i, j):
+    """Return table[i[:, None], j[None, :]] for the sorted index arrays i
+    and j, as a view of the table when both are ranges 0, 1, ..., n-1.
+    """
+    if i.size and j.size and i[-1] == i.size - 1 and j[-1] == j.size - 1:
+        # dense operands: views of the tables, not N*N gathered copies
+        return table[:i.size, :j.size]
+    return table[np.ix_(i, j)]
+
+
+def _geometric_signs(dim, i, j):
+    """Return the signs of the geometric products of the blades i and j
+    of GA(dim), as an array of shape (len(i), len(j)).
+    """
+    if dim <= _TABLE_DIM:
+        return _gather(_cayley(dim)[1], i, j)
+    return _blade_signs(i[:, None], j[None, :])
+
+
+def _inner_signs(dim, i, j):
+    """Like _geometric_signs, for the symmetric (inner) part."""
+    if dim <= _TABLE_DIM:
+        return _gather(_commutator_signs(dim)[0], i, j)
+    return (_blade_signs(i[:, None], j[None, :])
+            + _blade_signs(j[None, :], i[:, None])) >> 1
+
+
+def _outer_signs(dim, i, j):
+    """Like _geometric_signs, for the antisymmetric (outer) part."""
+    if dim <= _TABLE_DIM:
+        return _gather(_commutator_signs(dim)[1], i, j)
+    return (_blade_signs(i[:, None], j[None, :])
+            - _blade_signs(j[None, :], i[:, None])) >> 1
+
+
+@functools.lru_cache(maxsize=None)
+def _rev_signs(dim):
+    """Return the array of signs, indexed by standard basis blade, that
+    the reversion applies to the coefficients of a multivector in
+    GA(dim): -1.0 for blades of grade 2 or 3 mod 4, 1.0 otherwise.  The
+    array is shared and must not be modified.
+    """
+    signs = np.where(_popcnt(dim) % 4 >= 2, -1.0, 1.0)
+    signs.flags.writeable = False
+    return signs
+
+
+@functools.lru_cache(maxsize=None)
+def _commutator_signs(dim):
+    """Return the pair (sym, anti) of (2**dim, 2**dim) int8 arrays holding
+    (S + S.T)/2 and (S - S.T)/2 for the sign table S of _cayley(dim).
+    Used with K, they give the symmetric and antisymmetric parts of the
+    geometric product in a single pass.  The arrays are shared and must
+    not be modified.
+    """
+    S = _cayley(dim)[1]
+    # the sums and differences are -2, 0 or 2, so halving is exact
+    sym = (S + S.T) >> 1
+    anti = (S - S.T) >> 1
+    sym.flags.writeable = False
+    anti.flags.writeable = False
+    return sym, anti
+
+
+@functools.lru_cache(maxsize=None)
+def _dual_map(dim):
+    """Return the pair (perm, signs) of arrays such that the dual of a
+    multivector x in GA(dim) has coefficients x._data[perm] * signs.
+
+    The dual is x*I*I*I = x*(I*I)*I, and I*I is a scalar, so each blade i
+    is sent to the blade i ^ I with the sign of i*I times that of I*I.
+    The arrays are shared and must not be modified.
+    """
+    full = (1 << dim) - 1
+    perm = np.arange(1 << dim) ^ full
+    signs = (_blade_signs(perm, full) * _blade_signs(full, full)).astype(
+        np.float64)
+    perm.flags.writeable = False
+    signs.flags.writeable = False
+    return perm, signs
+
+
+@functools.lru_cache(maxsize=None)
+def _pseudoscalar(dim):
+    """Return the coefficient array of the standard pseudoscalar of
+    GA(dim).  The array is shared and must not be modified; copy it.
+    """
+    data = np.zeros(1 << dim)
+    data[-1] = 1.0
+    data.flags.writeable = False
+    return data
+
 
 class MultiVector:
     """
     MultiVector(dim) -> the (mutable) zero multivector in GA(dim), for dim >= 0
     """
     def __init__(self, dim):
-        self._data = [0.0]*(2**dim)
+        self._data = np.zeros(1 << dim)
         self._dim = dim
 
 
@@ -32,7 +192,7 @@ must be from 0 to 2**dim - 1.
         operations and the GA class to work with multivectors.
 
         """
-        return self._data[i]
+        return float(self._data[i])
 
     def __setitem__(self, i, coef):
         """Set the ith coefficient, where the bits of i illustrate the
@@ -82,13 +242,15 @@ the coefficient of [4,2,1] in x is nonzero.
         operations and the GA class to work with multivectors.
 
         """                                
-        for i in range(len(self._data)):
-            if self._data[i]:
-                yield i
+        return iter(np.flatnonzero(self._data).tolist())
 
     def __len__(self):
         """Return the number of nonzero terms in this multivector."""
-        return len(self._data) - self._data.count(0.0)
+        return int(np.count_nonzero(self._data))
+
+    def __bool__(self):
+        """Return True if this multivector has any nonzero terms."""
+        return bool(self._data.any())
 
     def __eq__(self, other):
         """Return True if this multivector is equal to the other multivector,
@@ -96,24 +258,19 @@ having equal coefficents and the same dimensionality for the parent
 geometric algebra.
 
         """
-        return isinstance(other, MultiVector) and self._data == other._data
+        return isinstance(other, MultiVector) and np.array_equal(self._data, other._data)
 
     def __pos__(self):
         """
         Return a copy of this multivector.
         """
-        x = MultiVector(self.dim)
-        x._data = self._data.copy()
-        return x
+        return MultiVector._wrap(self.dim, self._data.copy())
 
     def __neg__(self):
         """
         Return the negation of this multivector.
         """
-        x = MultiVector(self.dim)
-        for i in range(len(self._data)):
-            x._data[i] = -self._data[i]
-        return x
+        return MultiVector._wrap(self.dim, -self._data)
 
     def __float__(self):
         """Raise a TypeError exception if this multivector is not a scalar.
@@ -137,10 +294,8 @@ geometric algebra.
             return x
         m = max(self.dim, other.dim)
         x = MultiVector(m)
-        for i in range(len(self._data)):
-            x._data[i] = self._data[i]
-        for i in range(len(other._data)):
-            x._data[i] += other._data[i]
+        x._data[:len(self._data)] = self._data
+        x._data[:len(other._data)] += other._data
         return x
 
     def __radd__(self, other):
@@ -150,33 +305,57 @@ geometric algebra.
         """
         Subtract the two multivectors, or a multivector and a number.
         """
-        return self + (-other)
+        if isinstance(other, Number):
+            x = +self
+            x._data[0] -= float(other)
+            return x
+        m = max(self.dim, other.dim)
+        x = MultiVector(m)
+        x._data[:len(self._data)] = self._data
+        x._data[:len(other._data)] -= other._data
+        return x
 
     def __rsub__(self, other):
-        return -self + other
+        if isinstance(other, Number):
+            x = -self
+            x._data[0] += float(other)
+            return x
+        return NotImplemented
     
     def __mul__(self, other):
         """
         Multiply the two multivectors, or a multivector and a number.
         """
-        if isinstance(other, Number):
-            x = MultiVector(self.dim)
-            for i in range(len(self._data)):
-                x._data[i] = self._data[i] * float(other)
-            return x
+        if type(other) in _NUMBER or isinstance(other, Number):
+            return MultiVector._wrap(self.dim, self._data * float(other))
+        if not isinstance(other, MultiVector):
+            return NotImplemented
         m = max(self.dim, other.dim)
-        x = MultiVector(m)
-        for i in range(len(self._data)):
-            if self._data[i]:
-                for j in range(len(other._data)):
-                    if other._data[j]:
-                        k, s = MultiVector._blade_combine(i, j)
-                        x._data[k] += self._data[i]*other._data[j]*s
-        return x
+        return self._product(other, m, _geometric_signs)
+
+    def _product(self, other, m, signs):
+        """Return the bilinear product of this multivector and the other in
+        GA(m) that takes the standard basis blades i and j to s times the
+        blade i ^ j, where signs(m, i, j) gives the array of those s for
+        arrays of blades i and j.
+
+        """
+        # only pairs of nonzero terms contribute, and typical multivectors
+        # (blades, rotors) have few of them
+        i = np.flatnonzero(self._data)
+        j = np.flatnonzero(other._data)
+        if m <= _TABLE_DIM:
+            K = _gather(_cayley(m)[0], i, j)
+        else:
+            K = np.bitwise_xor.outer(i, j)
+        prod = np.outer(self._data[i], other._data[j])
+        prod *= signs(m, i, j)
+        data = np.bincount(K.ravel(), weights=prod.ravel(), minlength=1 << m)
+        return MultiVector._wrap(m, data)
 
     def __rmul__(self, other):
-        if isinstance(other, Number):
-            return self*other
+        if type(other) in _NUMBER or isinstance(other, Number):
+            return MultiVector._wrap(self.dim, self._data * float(other))
         if isinstance(other, MultiVector):
             return other*self
         return NotImplemented
@@ -186,20 +365,20 @@ geometric algebra.
         and a number.
 
         """        
-        x = self*other - other*self
-        for i in range(len(x._data)):
-            x._data[i] /= 2
-        return x
+        if isinstance(other, Number):
+            return MultiVector(self.dim)
+        m = max(self.dim, other.dim)
+        return self._product(other, m, _outer_signs)
 
     def __matmul__(self, other):
         """Find the inner (dot) product of the two multivectors, or of a multivector
         and a number.
 
         """                
-        x = self*other + other*self
-        for i in range(len(x._data)):
-            x._data[i] /= 2
-        return x
+        if isinstance(other, Number):
+            return self*other
+        m = max(self.dim, other.dim)
+        return self._product(other, m, _inner_signs)
 
     def __or__(self, other):
         """Find the meet (vee) of the two multivectors, or of a multivector
@@ -210,32 +389,18 @@ geometric algebra.
     
     def __abs__(self):
         """Find the norm of the multivector"""
-        x = 0.0
-        for i in self:
-            a = self._data[i]
-            x += a*a
-        return math.sqrt(x)
+        return math.sqrt(float(np.dot(self._data, self._data)))
 
     def __invert__(self):
         """Return the reversion of the multivector"""
-        x = MultiVector(self.dim)
-        for i in range(len(self._data)):
-            v = self._data[i]
-            if v:
-                r = MultiVector._rank(i) % 4
-                if r==2 or r==3:
-                    x[i] = -v
-                else:
-                    x[i] = v
-        return x
+        return MultiVector._wrap(self.dim, self._data * _rev_signs(self.dim))
 
     def rank(self):
         """Compute the rank (maximum grade among terms) of the multivector"""
-        r = -math.inf
-        for i in range(len(self._data)):
-            if self._data[i]:
-                r = max(r, MultiVector._rank(i))
-        return r
+        nz = np.flatnonzero(self._data)
+        if not nz.size:
+            return -math.inf
+        return int(_popcnt(self.dim)[nz].max())
 
     def cross_product(self, other):
         """
@@ -251,8 +416,7 @@ geometric algebra.
             s = 1.0 / float(self*x)
         except TypeError:
             return NotImplemented
-        for i in range(len(x._data)):
-            x._data[i] *= s
+        x._data *= s
         return x
 
     def right_inv(self):
@@ -263,8 +427,7 @@ geometric algebra.
             s = 1.0 / float(x*self)
         except TypeError:
             return NotImplemented
-        for i in range(len(x._data)):
-            x._data[i] *= s
+        x._data *= s
         return x    
                 
     def __truediv__(self, other):
@@ -281,69 +444,51 @@ geometric algebra.
         """
         Return the dual of the multivector.
         """
-        x = self.I
-        return self*x*x*x
+        perm, signs = _dual_map(self.dim)
+        return MultiVector._wrap(self.dim, self._data[perm] * signs)
 
     @property
     def I(self):
         """
         Return the standard pseudoscalar of the algebra this multivector is in.
         """
-        x = MultiVector(self.dim)
-        x._data[-1] = 1.0
-        return x
+        return MultiVector._wrap(self.dim, _pseudoscalar(self.dim).copy())
 
     def __str__(self):
-        result = ""
-        for i in self:
-            coef = self[i]
-            if result:
-                result += ' + '
-            result += str(coef)
-            bit = 1
-            k = 1
-            first = True
-            while bit <= i:
-                if i & bit:
-                    if first:
-                        result += '*['
-                        first = False
-                    else:
-                        result += ','
-                    result += '%d' % k
-                k += 1
-                bit *= 2
-            if not first:
-                result += ']'
-        if not result:
-            return '0'
-        return result
+        return self._format('')
 
     def __repr__(self):
-        result = ""
+        return self._format('GA(%d)' % self._dim)
+
+    def _format(self, algebra):
+        """Join the nonzero terms as coef*<algebra>[k1,k2,...], where the
+        k's are the 1-up indices of the basis vectors in each blade."""
+        parts = []
+        data = self._data
         for i in self:
-            coef = self[i]
-            if result:
-                result += ' + '
-            result += str(coef)
-            bit = 1
-            k = 1
-            first = True
-            while bit <= i:
-                if i & bit:
-                    if first:
-                        result += '*GA(%d)[' % self._dim
-                        first = False
-                    else:
-                        result += ','
-                    result += '%d' % k
-                k += 1
-                bit *= 2
-            if not first:
-                result += ']'
-        if not result:
-            return '0'
-        return result
+            coef = str(float(data[i]))
+            if not i:
+                parts.append(coef)
+                continue
+            indices = []
+            append = indices.append
+            while i:
+                bit = i & -i
+                append(str(bit.bit_length()))
+                i ^= bit
+            parts.append('%s*%s[%s]' % (coef, algebra, ','.join(indices)))
+        return ' + '.join(parts) or '0'
+
+    @staticmethod
+    def _wrap(dim, data):
+        """Return a multivector in GA(dim) that takes ownership of the
+        coefficient array data, of length 2**dim, without first allocating
+        a zero array to overwrite.
+        """
+        x = MultiVector.__new__(MultiVector)
+        x._data = data
+        x._dim = dim
+        return x
 
     @staticmethod
     def _rank(a):
@@ -359,8 +504,37 @@ geometric algebra.
         >>> MultiVector._rank(1+8+16+128+1024+16384 + 1048576)
         7
         """
-        return bin(a).count('1')
-    
+        return a.bit_count()
+
+    @staticmethod
+    def _swar_popcount(a):
+        """
+        Return the hamming weight of the nonnegative integer a, counting
+        each 64-bit word with branch-free SWAR bit arithmetic.  This is
+        _rank on Pythons without int.bit_count (before 3.10).
+
+        >>> MultiVector._swar_popcount(0)
+        0
+        >>> MultiVector._swar_popcount(65535)
+        16
+        >>> MultiVector._swar_popcount(2**64 - 1)
+        64
+        >>> MultiVector._swar_popcount(2**200 + 2**64 + 7)
+        5
+        """
+        n = 0
+        while a:
+            v = a & 0xFFFFFFFFFFFFFFFF
+            v -= (v >> 1) & 0x5555555555555555
+            v = (v & 0x3333333333333333) + ((v >> 2) & 0x3333333333333333)
+            v = (v + (v >> 4)) & 0x0F0F0F0F0F0F0F0F
+            n += ((v * 0x0101010101010101) & 0xFFFFFFFFFFFFFFFF) >> 56
+            a >>= 64
+        return n
+
+    if not hasattr(int, 'bit_count'):
+        _rank = _swar_popcount
+
         
     @staticmethod
     def _blade_combine(a, b):
@@ -388,22 +562,17 @@ geometric algebra.
         (65535, -1)
 
         """
-        if a==0:
-            return b, 1
-        if b==0:
-            return a, 1
         c = a ^ b
-        s = 1
-        p = max(a,b)
-        d = MultiVector._rank(a)
-        e = 1
-        while e <= p:
-            if e & a:
-                d -= 1
-            if (d&1) and (e & b):
-                s = -s
-            e *= 2
-        return c, s
+        rank = MultiVector._rank
+        # each basis vector of b moves past the basis vectors of a above it
+        n = 0
+        while b:
+            e = b & -b
+            n += rank(a >> e.bit_length())
+            b ^= e
+        if n & 1:
+            return c, -1
+        return c, 1
                 
         
 if __name__ == '__main__':
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+import sys
+sys.path.append('./py')
+
+from numbers import Number
+
+import numpy as np
+
+from multivector import MultiVector, _TABLE_DIM, _blade_signs, _cayley
+
+
+class MultiVectorBatch:
+    """MultiVectorBatch(dim, n) -> a batch of n (mutable) zero multivectors
+    in GA(dim), for dim >= 0
+
+    The coefficients of the whole batch are stored together as one
+    (n, 2**dim) array, so multiplying every member of the batch by the
+    same multivector takes a handful of array operations instead of n
+    separate MultiVector products.
+
+    Example:
+    >>> from ga import GA
+    >>> ga = GA(3)
+    >>> b = MultiVectorBatch.from_multivectors([ga[1], ga[2], 2 + ga[1,2]])
+    >>> [str(x) for x in b * ga[1,2]]
+    ['1.0*[2]', '-1.0*[1]', '-1.0 + 2.0*[1,2]']
+    >>> [str(x) for x in ga[1,2] * b]
+    ['-1.0*[2]', '1.0*[1]', '-1.0 + 2.0*[1,2]']
+
+    Members from smaller algebras are embedded in the batch's algebra:
+    >>> b = MultiVectorBatch.from_multivectors([ga[1], GA(0).scalar(2)])
+    >>> [str(x) for x in b]
+    ['1.0*[1]', '2.0']
+    >>> b[0] = GA(4)[4]
+    Traceback (most recent call last):
+    ...
+    ValueError: dimensions 4 > 3
+
+    """
+    def __init__(self, dim, n):
+        self._data = np.zeros((n, 1 << dim))
+        self._dim = dim
+
+    @classmethod
+    def from_multivectors(cls, xs):
+        """Create a batch holding copies of the multivectors xs, in the
+        largest geometric algebra containing them all."""
+        xs = list(xs)
+        dim = max((x.dim for x in xs), default=0)
+        x = cls(dim, len(xs))
+        for k in range(len(xs)):
+            x[k] = xs[k]
+        return x
+
+    @property
+    def dim(self):
+        """
+        x.dim -> the order of the geometric algebra containing the batch.
+        """
+        return self._dim
+
+    def __len__(self):
+        """Return the number of multivectors in the batch."""
+        return len(self._data)
+
+    def __getitem__(self, k):
+        """Return a copy of the kth multivector in the batch."""
+        return MultiVector._wrap(self.dim, self._data[k].copy())
+
+    def __setitem__(self, k, x):
+        """Overwrite the kth multivector in the batch with the multivector
+        x, from the same geometric algebra or a smaller one."""
+        if x.dim > self.dim:
+            raise ValueError("dimensions %d > %d" % (x.dim, self.dim))
+        row = self._data[k]
+        row[len(x._data):] = 0.0
+        row[:len(x._data)] = x._data
+
+    def __iter__(self):
+        """Generate copies of the multivectors in the batch, in order."""
+        for k in range(len(self)):
+            yield self[k]
+
+    def __mul__(self, other):
+        """Right-multiply every multivector in the batch by the same
+        multivector, or by a number."""
+        if isinstance(other, Number):
+            return MultiVectorBatch._wrap(self.dim, self._data * float(other))
+        if isinstance(other, MultiVector):
+            return self._product(other, False)
+        return NotImplemented
+
+    def __rmul__(self, other):
+        """Left-multiply every multivector in the batch by the same
+        multivector, or by a number."""
+        if isinstance(other, Number):
+            return self * other
+        if isinstance(other, MultiVector):
+            return self._product(other, True)
+        return NotImplemented
+
+    def _product(self, r, left):
+        """Return the batch of products r*x (if left) or x*r for x in this
+        batch."""
+        m = max(self.dim, r.dim)
+        b = self._data.shape[1]
+        blades = np.arange(b)
+        if m <= _TABLE_DIM:
+            K, S = _cayley(m)
+        data = np.zeros((len(self), 1 << m))
+        # for a fixed blade j of r, i -> i ^ j is one-to-one, so each
+        # nonzero term of r scatters the whole batch without collisions
+        for j in np.flatnonzero(r._data):
+            if m > _TABLE_DIM:
+                # too big for the cached tables; compute the one row needed
+                k = j ^ blades
+                s = (_blade_signs(j, blades) if left
+                     else _blade_signs(blades, j))
+            elif left:
+                k, s = K[j, :b], S[j, :b]
+            else:
+                k, s = K[:b, j], S[:b, j]
+            data[:, k] += self._data * (r._data[j] * s)
+        return MultiVectorBatch._wrap(m, data)
+
+    @staticmethod
+    def _wrap(dim, data):
+        """Return a batch in GA(dim) that takes ownership of the (n, 2**dim)
+        coefficient array data."""
+        x = MultiVectorBatch.__new__(MultiVectorBatch)
+        x._data = data
+        x._dim = dim
+        return x
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -3,9 +3,33 @@
 import sys
 sys.path.append('./py')
 
-from collections import Iterable
+import functools
 import math
 import operator
+from numbers import Real
+
+import numpy as np
+
+@functools.lru_cache(maxsize=256)
+def _basis(n, i, dtype):
+    """Return the read-only coordinate array of the ith standard basis
+    vector in n-dimensional space, shared by every Vector.E(i) call."""
+    if not 1 <= i <= n:
+        raise IndexError(i)
+    a = np.zeros(n, dtype=dtype)
+    a[i-1] = 1.0
+    a.setflags(write=False)
+    return a
+
+
+@functools.lru_cache(maxsize=64)
+def _zeros(n, dtype):
+    """Return the read-only coordinate array of the zero vector in
+    n-dimensional space, shared by every zero vector of that size."""
+    a = np.zeros(n, dtype=dtype)
+    a.setflags(write=False)
+    return a
+
 
 class Vector:
     """Vectors are immutable.  Coordinates are 1-up, in keeping with
@@ -21,6 +45,10 @@ mathematical usage though against common computer programming usage.
     coordinates are specified by an iterable.  Missing coordinates get
     a default value of 0.0.  Extra coordinates are an error.
 
+    The coordinates are always held in a read-only, C-contiguous
+    float64 NumPy array (float32 after Vector.set_precision('float32')),
+    so np.asarray(v) shares it without copying.
+
     >>> z3 = Vector(3)
     >>> bool(z3)
     False
@@ -44,19 +72,90 @@ mathematical usage though against common computer programming usage.
     6
     >>> w.as_tuple()
     (1.0, 0.0, 1.0, 0.0, 0.0, 0.0)
+
+    >>> Vector(3, [1, None]) # doctest: +IGNORE_EXCEPTION_DETAIL
+    Traceback (most recent call last):
+    ...
+    TypeError: float() argument must be a string or a real number, not 'NoneType'
     """
 
+    # coordinate precision of newly created vectors; see set_precision
+    DTYPE = np.float64
+
     def __init__(self, n, *args):
-        if len(args) == 1 and isinstance(args[0] , Iterable):
-            l = [float(x) for x in args[0]]
+        if not args:
+            self._coefs = _zeros(n, Vector.DTYPE)
+            return
+        if len(args) == 1 and hasattr(args[0], '__iter__'):
+            src = args[0]
         else:
-            l = [float(x) for x in args]
-        if len(l) > n:
-            raise IndexError(len(l))
-        if len(l) < n:
-            l += [0.0]*(n - len(l))
-        self._coefs = tuple(l)
-            
+            src = args
+        if not isinstance(src, (np.ndarray, Vector)):
+            # float() rejects None, which NumPy would quietly turn into nan
+            src = list(map(float, src))
+        a = np.array(src, dtype=Vector.DTYPE)
+        if a.ndim != 1:
+            raise TypeError(a.shape)
+        if len(a) > n:
+            raise IndexError(len(a))
+        if len(a) < n:
+            src = a
+            a = np.zeros(n, dtype=a.dtype)
+            a[:len(src)] = src
+        a.setflags(write=False)
+        self._coefs = a
+
+    @classmethod
+    @functools.lru_cache(maxsize=64)
+    def zero(cls, n):
+        """Vector.zero(n) is the zero vector in n-dimensional space.  Since
+vectors are immutable, every call with the same n returns the same
+instance.
+
+        >>> Vector.zero(3) is Vector.zero(3)
+        True
+        >>> Vector.zero(3) == Vector(3)
+        True
+
+        """
+        return cls._from_array(_zeros(n, cls.DTYPE))
+
+    @classmethod
+    def set_precision(cls, precision):
+        """Vector.set_precision('float32') makes vectors created from then
+on store single precision coordinates, halving their memory and
+bandwidth.  Vector.set_precision('float64') restores the default double
+precision.  Existing vectors keep their precision, and arithmetic
+mixing the two gives double precision.
+
+        >>> Vector.set_precision('float32')
+        >>> np.asarray(Vector(3, 1, 0, 1)).dtype
+        dtype('float32')
+        >>> Vector(3, 0.1, 0, 0).x
+        0.10000000149011612
+        >>> Vector.set_precision('float64')
+        >>> np.asarray(Vector(3, 1, 0, 1)).dtype
+        dtype('float64')
+
+        """
+        dtype = np.dtype(precision).type
+        if dtype not in (np.float32, np.float64):
+            raise ValueError(precision)
+        cls.DTYPE = dtype
+        cls.zero.cache_clear()
+
+    @classmethod
+    def _from_array(cls, coefs):
+        """Return the vector whose coordinates are the float array coefs,
+        skipping the coercion and padding done by __init__.  The vector
+        takes ownership of coefs, which must not be modified afterwards.
+
+        """
+        assert coefs.dtype in (np.float64, np.float32) and coefs.flags.c_contiguous
+        v = cls.__new__(cls)
+        coefs.setflags(write=False)
+        v._coefs = coefs
+        return v
     
     @property
     def dim(self):
@@ -120,7 +219,33 @@ mathematical usage though against common computer programming usage.
         2.5
 
         """
-        return self._coefs[operator.index(i) - 1]
+        return float(self._coefs[operator.index(i) - 1])
+
+    # defer mixed arithmetic with NumPy scalars to Vector's own operators
+    __array_ufunc__ = None
+
+    def __array__(self, dtype=None, copy=None):
+        """np.asarray(v) is the read-only coordinate array of v, shared
+        rather than copied.
+
+        >>> a = np.asarray(Vector(3, 1, 0, 1))
+        >>> a.tolist()
+        [1.0, 0.0, 1.0]
+        >>> a.flags.writeable
+        False
+        >>> np.array(Vector(3, 1, 0, 1), dtype=np.float32, copy=False)
+        Traceback (most recent call last):
+        ...
+        ValueError: converting to float32 needs a copy
+
+        """
+        if copy:
+            return np.array(self._coefs, dtype=dtype)
+        if dtype is None or np.dtype(dtype) == self._coefs.dtype:
+            return self._coefs
+        if copy is False:
+            raise ValueError("converting to %s needs a copy" % np.dtype(dtype))
+        return self._coefs.astype(dtype)
 
     def __contains__(self, a):
         """
@@ -131,8 +256,23 @@ mathematical usage though against common computer programming usage.
         True
         >>> 5 in v
         False
-        """
-        return a in self._coefs
+        >>> w = Vector(9, range(9))
+        >>> 8 in w, 9 in w
+        (True, False)
+        >>> [1] in v, [1] in w
+        (False, False)
+        """
+        if len(self._coefs) < 8:
+            return a in self._coefs.tolist()
+        # vectors are immutable, so longer ones keep a set for repeated queries
+        s = self.__dict__.get('_set')
+        if s is None:
+            s = self._set = frozenset(self._coefs.tolist())
+        try:
+            return a in s
+        except TypeError:
+            # unhashable, so not a float; compare as a tuple would
+            return a in self._coefs.tolist()
         
 
     def __iter__(self):
@@ -144,7 +284,7 @@ mathematical usage though against common computer programming usage.
         [1.0, 2.0, 2.5, 3.0, 1.0, -1.0, 0.0]
         
         """
-        return iter(self._coefs)
+        return iter(self._coefs.tolist())
 
     def __len__(self):
         """x.dim() == len(x) is the dimensionality of the vector space this
@@ -184,9 +324,32 @@ mathematical usage though against common computer programming usage.
         False
         >>> v != y
         True
+        >>> v == (1.0, 0.0, 1.0)
+        False
 
         """
-        return self._coefs == other._coefs
+        return (isinstance(other, Vector)
+                and self._coefs.shape == other._coefs.shape
+                and np.array_equal(self._coefs, other._coefs))
+
+    def __hash__(self):
+        """hash(v) agrees with ==, so vectors can be set members and dict
+keys.  It is computed on first use and cached, since vectors are
+immutable.
+
+        >>> s = {Vector(3, 1, 0, 1), Vector(3, [1.0, 0.0, 1.0])}
+        >>> len(s)
+        1
+        >>> Vector(3, 1, 0, 1) in s
+        True
+        >>> hash(Vector(2, 0, 1)) == hash(Vector(2, -0.0, 1))
+        True
+
+        """
+        h = self.__dict__.get('_hash')
+        if h is None:
+            h = self._hash = hash(tuple(self._coefs.tolist()))
+        return h
 
     def __pos__(self):
         """+v is v
@@ -211,7 +374,7 @@ correwsponding coordinates of v.
         (-1.0, -0.0, -1.0)
 
         """
-        return Vector(len(self), [-x for x in self])
+        return Vector._from_array(-self._coefs)
 
     def __add__(self, other):
         """v + w is the vector having the same dimension as both v and w, and
@@ -222,11 +385,16 @@ coordinates in v and w.
         >>> w = Vector(3, 2, 1, -1)
         >>> (v + w).as_tuple()
         (3.0, 1.0, 0.0)
+        >>> v + Vector(2, 1, 1)
+        Traceback (most recent call last):
+        ...
+        ValueError: dimensions 3 != 2
 
         """
-        if len(self) != len(other):
-            raise NotImplementedError("dimensions %d != %d" %(len(self), len(other)))
-        return Vector(len(self), [x + y for (x,y) in zip(self, other)])
+        n = self._coefs.shape[0]
+        if other._coefs.shape[0] != n:
+            raise ValueError("dimensions %d != %d" %(n, other._coefs.shape[0]))
+        return Vector._from_array(self._coefs + other._coefs)
 
     def __sub__(self, other):
         """v - w is the vector having the same dimension as both v and w, and
@@ -238,9 +406,10 @@ coordinates in v and w.
         >>> (v - w).as_tuple()
         (-1.0, -1.0, 2.0)
         """
-        if len(self) != len(other):
-            raise NotImplementedError("dimensions %d != %d" %(len(self), len(other)))
-        return Vector(len(self), [x - y for (x,y) in zip(self, other)])
+        n = self._coefs.shape[0]
+        if other._coefs.shape[0] != n:
+            raise ValueError("dimensions %d != %d" %(n, other._coefs.shape[0]))
+        return Vector._from_array(self._coefs - other._coefs)
 
     def __mul__(self, scalar):
         """v*a is the vector having the same dimension as v and whose
@@ -250,9 +419,15 @@ coordinates, and the float value a.
         >>> v = Vector(3, 1, 0, 1)       
         >>> (v * 2.5).as_tuple()
         (2.5, 0.0, 2.5)
+        >>> v * [1, 2, 3]
+        Traceback (most recent call last):
+        ...
+        TypeError: can't multiply sequence by non-int of type 'Vector'
 
         """
-        return Vector(len(self), [x* scalar for x in self])
+        if not isinstance(scalar, Real):
+            return NotImplemented
+        return Vector._from_array(self._coefs * float(scalar))
 
     def __truediv__(self, scalar):
         """v/a is the vector having the same dimension as v and whose
@@ -262,9 +437,21 @@ coordinates, and the float value 1.0/a.
         >>> v = Vector(3, 1, 0, 1)       
         >>> (v / 2.5).as_tuple()
         (0.4, 0.0, 0.4)
-
-        """
-        return Vector(len(self), [x / scalar for x in self])
+        >>> v / 0
+        Traceback (most recent call last):
+        ...
+        ZeroDivisionError: float division by zero
+        >>> from fractions import Fraction
+        >>> (v / Fraction(1, 2)).as_tuple()
+        (2.0, 0.0, 2.0)
+
+        """
+        if not isinstance(scalar, Real):
+            return NotImplemented
+        scalar = float(scalar)
+        if scalar == 0:
+            raise ZeroDivisionError("float division by zero")
+        return Vector._from_array(self._coefs / scalar)
     
     def __rmul__(self, scalar):
         """a*v is the vector having the same dimension as v and whose
@@ -273,8 +460,13 @@ coordinates, and the float value a.
         >>> v = Vector(3, 1, 0, 1)       
         >>> (2.5*v).as_tuple()
         (2.5, 0.0, 2.5)
+        >>> from fractions import Fraction
+        >>> (Fraction(1, 2)*v).as_tuple()
+        (0.5, 0.0, 0.5)
 """
-        return Vector(len(self), [x* scalar for x in self])        
+        if not isinstance(scalar, Real):
+            return NotImplemented
+        return Vector._from_array(self._coefs * float(scalar))        
 
     def __matmul__(self, other):
         """v @ w is the dot product of v and w, the real number that is the
@@ -286,9 +478,15 @@ sum of the products of corresponding coefficients of v and w.
         2.0
 
         """
-        if len(self) != len(other):
-            raise NotImplementedError("dimensions %d != %d" %(len(self), len(other)))
-        return sum(x*y for (x,y) in zip(self, other))
+        n = self._coefs.shape[0]
+        if other._coefs.shape[0] != n:
+            raise ValueError("dimensions %d != %d" %(n, other._coefs.shape[0]))
+        if n == 3:
+            # for 3-vectors the NumPy call costs more than the arithmetic
+            a1, a2, a3 = self._coefs.tolist()
+            b1, b2, b3 = other._coefs.tolist()
+            return a1*b1 + a2*b2 + a3*b3
+        return float(np.dot(self._coefs, other._coefs))
         
     def __abs__(self):
         """abs(v) is the norm of v, the square root of the some of the squares
@@ -299,8 +497,10 @@ sum of the products of corresponding coefficients of v and w.
         >>> abs(v)
         13.0
         """
-        x = sum(x*x for x in self)
-        return math.sqrt(x)
+        a = self.__dict__.get('_norm')
+        if a is None:
+            a = self._norm = math.hypot(*self._coefs.tolist())
+        return a
 
     def cross_product(self, other):
         """v.cross_product(w) is only defined if len(v)==len(w)==3.  It is
@@ -322,7 +522,27 @@ w.
             raise NotImplementedError("dimension %d != 3" %(len(self), 3))
         if len(other) != 3:
             raise NotImplementedError("dimension %d != 3" %(len(other), 3))
-        return Vector(3, self.y*other.z - self.z*other.y, self.z*other.x - self.x*other.z, self.x*other.y - self.y*other.x)
+        a1, a2, a3 = self._coefs.tolist()
+        b1, b2, b3 = other._coefs.tolist()
+        return Vector._from_array(np.array((a2*b3 - a3*b2, a3*b1 - a1*b3, a1*b2 - a2*b1), dtype=Vector.DTYPE))
+
+    def inner_outer(self, other):
+        """v.inner_outer(w) is the pair (v @ w, v.cross_product(w)) for 3d
+vectors v and w, computed together from a single read of the six
+coordinates.
+
+        >>> v = Vector(3, 1, 2, 0)
+        >>> w = Vector(3, 0, 1, 0)
+        >>> v.inner_outer(w)
+        (2.0, Vector(3, 0.0, 0.0, 1.0))
+
+        """
+        if self._coefs.shape[0] != 3 or other._coefs.shape[0] != 3:
+            raise ValueError("dimensions %d, %d != 3" %(len(self), len(other)))
+        a1, a2, a3 = self._coefs.tolist()
+        b1, b2, b3 = other._coefs.tolist()
+        return (a1*b1 + a2*b2 + a3*b3,
+                Vector._from_array(np.array((a2*b3 - a3*b2, a3*b1 - a1*b3, a1*b2 - a2*b1), dtype=Vector.DTYPE)))
 
     def to_cylindrical(self):
         """
@@ -332,9 +552,8 @@ w.
         >>> v.to_cylindrical()
         (1.4142135623730951, 0.7853981633974483, 0.0)
         """
-        theta = math.atan2(self.y, self.x)
-        r = math.sqrt(self.x*self.x + self.y*self.y)
-        return (r, theta, self.z)
+        x, y, z = self._coefs[:3].tolist()
+        return (math.hypot(x, y), math.atan2(y, x), z)
 
     def to_spherical(self):
         """Return (r, phi, theta), the spherical coordinates of this 3d
@@ -346,19 +565,20 @@ w.
         (1.4142135623730951, 1.5707963267948966, 0.7853981633974483)
 
         """        
-        rho = math.sqrt(self.x*self.x + self.y*self.y + self.z*self.z)
-        theta = math.atan2(self.y, self.x)
+        x, y, z = self._coefs[:3].tolist()
+        rho = math.hypot(x, y, z)
+        theta = math.atan2(y, x)
         if rho:
-            phi = math.acos(self.z/rho)
+            phi = math.acos(z/rho)
         else:
             phi = 0
         return (rho, phi, theta)
     
     def __str__(self):
-        return str(self.as_tuple())
+        return str(tuple(self._coefs.tolist()))
 
     def __repr__(self):
-        return 'Vector(' + str(len(self)) + ', ' + ', '.join([str(x) for x in self.as_tuple()]) + ')'
+        return 'Vector(%d, %s)' % (len(self._coefs), ', '.join(map(repr, self._coefs.tolist())))
 
     def concat(self, other):
         """v.concat(w) is the vector u such that len(u)==len(v)+len(w) and the
@@ -369,7 +589,7 @@ coordinates of w.
         >>> str(v.concat(w))
         '(1.0, 0.0, 0.0, 0.0, 1.0, 0.0)'
         """
-        return Vector(len(self) + len(other), [x for x in self] + [x for x in other])
+        return Vector._from_array(np.concatenate((self._coefs, other._coefs)))
 
     def as_tuple(self):
         """v.as_tuple() is the unique tuple t such that len(v)==len(t) and for
@@ -380,7 +600,7 @@ if v.as_tuple() == t.
         (1.0, 0.0, 0.0)
 
         """
-        return self._coefs
+        return tuple(self._coefs.tolist())
     
     def __bool__(self):
         """bool(v) is True if v has any nonzero coefficients, false if it is a
@@ -392,7 +612,7 @@ zero vector.
         >>> bool(w)
         False
         """
-        return any(bool(x) for x in self)
+        return bool(self._coefs.any())
 
     def normalize(self):
         """v.normalize() is v itself if v is a zero vector (that is,
@@ -404,7 +624,7 @@ and there is a positive scalar float a such that a*v==u.
         """
         a = abs(self)
         if a:
-            return self * (1.0/a)
+            return Vector._from_array(self._coefs * (1.0/a))
         else:
             return self
 
@@ -418,7 +638,9 @@ less than pi.
         True
 
         """
-        return math.acos((self @ other) * (1.0/abs(self)/abs(other)))
+        na = abs(self)
+        nb = abs(other)
+        return math.acos((self @ other) / (na*nb))
 
     def E(self, i):
         """v.E(i) is the vector having the same dimension as v, but with 0.0
@@ -430,7 +652,7 @@ less than pi.
         '(0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0)'
 
         """
-        return Vector(len(self), [0]*(i-1) + [1])
+        return Vector._from_array(_basis(len(self), i, Vector.DTYPE))
 
     @classmethod
     def from_spherical(cls, rho, phi, theta):
@@ -443,7 +665,7 @@ less than pi.
         x = rho*s*math.cos(theta)
         y = rho*s*math.sin(theta)
         z = rho*math.cos(theta)
-        return Vector(3, x, y, z)
+        return Vector._from_array(np.array((x, y, z), dtype=Vector.DTYPE))
 
     @classmethod
     def from_cylindrical(cls, r, theta, z):
@@ -454,7 +676,7 @@ less than pi.
         """                
         x = r*math.cos(theta)
         y = r*math.sin(theta)
-        return Vector(3, x, y, z)
+        return Vector._from_array(np.array((x, y, z), dtype=Vector.DTYPE))
     
 if __name__ == '__main__':
     import doctest
@@ -6,8 +6,17 @@ sys.path.append('./py')
 from tests.test import *
 from tests.random import *
 
+import functools
+
+import numpy as np
+
 from ga import GA
 from multivector import MultiVector
+from multivectorbatch import MultiVectorBatch
+
+@functools.lru_cache(maxsize=None)
+def _ga(n):
+    return GA(n)
 
 ga = GA(3)
 assert ga.n == 3
@@ -56,10 +65,11 @@ asserteq(i*j, k)
 asserteq(j*k, i)
 asserteq(k*i, j)
 
-for iter in range(100):
-    x = random_multivector()
-    y = random_multivector()
-    z = random_multivector()
+seed(0)
+X = random_multivector_batch(100)
+Y = random_multivector_batch(100)
+Z = random_multivector_batch(100)
+for x, y, z in zip(X, Y, Z):
     asserteq((x*y)*z, x*(y*z))
     asserteq(x*y, x @ y + (x & y))
     asserteq(x+y, y+x)
@@ -97,28 +107,23 @@ for iter in range(100):
     
 
 def signum(l):
+    # sign of the permutation sorting l: the product of sgn(l[j] - l[i])
+    # over pairs i < j, where equal entries need no swap and count as +1
     s = 1
     for i in range(len(l)):
-        for j in range(len(l)-1, i, -1):
-            if l[j] < l[j-1]:
-                x = l[j-1]
-                l[j-1] = l[j]
-                l[j] = x
-                s = -s
+        for j in range(i+1, len(l)):
+            s *= (l[j] >= l[i]) - (l[j] < l[i])
     return s
                         
 
 assert signum([1,2,3,6,12]) == 1
 assert signum([1,2,6,3,12]) == -1
+assert signum([1,2,1]) == -1
 
-def dedup(l):
-    x = []
-    for v in l:
-        if x and x[-1] == v:
-            x.pop()
-        else:
-            x.append(v)
-    return x
+# BITS[i] is the ascending list of basis indices of blade i, for rank <= 3
+BITS = [[k+1 for k in range(3) if i>>k & 1] for i in range(8)]
+# _ALL[a] holds every blade index of GA(a), for rank <= 3
+_ALL = [frozenset(range(1 << k)) for k in range(4)]
 
 def blade_to_list(x):
     if not x:
@@ -128,21 +133,37 @@ def blade_to_list(x):
     j = -1
     for i in x:
 #        print('btol:',i, x[i])
-        j = bin(i)[2:]
-        l = [len(j) - i for i in range(len(j)) if j[i] == '1']
-        l.reverse()
+        l = []
+        while i:
+            bit = i & -i
+            l.append(bit.bit_length())
+            i ^= bit
         return l
+
+# CAYLEY_SIGN[i, j] and CAYLEY_IDX[i, j] give the product of blades i and j
+# as a sign and a blade, for rank <= 3
+CAYLEY_SIGN = np.empty((8, 8), np.int8)
+CAYLEY_IDX = np.empty((8, 8), np.int8)
+for i in range(8):
+    for j in range(8):
+        CAYLEY_SIGN[i, j] = signum(BITS[i] + BITS[j])
+        CAYLEY_IDX[i, j] = i ^ j
+
+def _gp_reference(xd, yd, sign_tbl, idx_tbl, out):
+    # out[idx_tbl[i, j]] += sign_tbl[i, j]*xd[i]*yd[j] for all i, j
+    n = len(xd)
+    np.add.at(out, idx_tbl[:n, :n], sign_tbl[:n, :n] * np.outer(xd, yd))
         
 for iter in range(100):
     x = random_blade()
     y = random_blade()
-    l = blade_to_list(x) + blade_to_list(y)
-    s = signum(l)
-    l = dedup(l)
+    s = signum(blade_to_list(x) + blade_to_list(y))
+    (i,) = x
+    (j,) = y
+    # repeated basis vectors cancel, leaving the symmetric difference
     z = x*y
-    assert blade_to_list(z) == l
-    for i in z:
-        assert z[i] == s
+    assert list(z) == [i ^ j]
+    assert z[i ^ j] == s
     
     a = random_blade()
     b = random_blade()
@@ -159,10 +180,11 @@ for iter in range(100):
 
     #test MultiVector.__init__
     a = random_rank()
+    dim = 1 << a
     x = MultiVector(a)
     assert x.dim == a
     assert not x
-    assert len(x._data) == 2**a
+    assert len(x._data) == dim
     for i in x._data:
         assert not i
 
@@ -171,11 +193,9 @@ for iter in range(100):
     y = MultiVector(a)
 #    print(x, a)
     for i in x:
-        j = bin(i)[2:]
-        l = [len(j) - i for i in range(len(j)) if j[i] == '1']
-        l.reverse()
-#        print(i, j, l, a)
-        b = GA(a)[tuple(l)]
+        l = [k+1 for k in range(a) if i>>k & 1]
+#        print(i, l, a)
+        b = _ga(a)[tuple(l)]
 #        print(x[i], b)
         y += x[i] * b
 #    print( )       
@@ -202,7 +222,7 @@ for iter in range(100):
 
     #test MultiVector.__contains__
     x = random_multivector(a)
-    s = set(range(2**a))
+    s = set(_ALL[a])
     for i in x:
         assert i in x
         s.discard(i)
@@ -212,10 +232,11 @@ for iter in range(100):
     #test MultiVector.__iter__
     x = random_multivector(a)
     l = [i for i in x]
-    for i in range(2**a):
+    p = 0
+    for i in range(dim):
         if x[i] != 0:
-            assert l[0] == i
-            l.pop(0)
+            assert l[p] == i
+            p += 1
         else:
             assert i not in l
 
@@ -254,8 +275,7 @@ for iter in range(100):
     x = random_multivector(a)
     y = random_multivector(a)
     z = MultiVector(a)
-    for i in range(0, 2**a):
-        z[i] = x[i] + y[i]
+    z._data[:] = x._data + y._data
     asserteq(x+y, z)
     y = random_scalar(a)
     z = +x
@@ -268,8 +288,7 @@ for iter in range(100):
     x = random_multivector(a)
     y = random_multivector(a)
     z = MultiVector(a)
-    for i in range(0, 2**a):
-        z[i] = x[i] + y[i]
+    z._data[:] = x._data + y._data
     asserteq(x+y, z)
     y = random_scalar(a)
     z = +x
@@ -281,8 +300,7 @@ for iter in range(100):
     x = random_multivector(a)
     y = random_multivector(a)
     z = MultiVector(a)
-    for i in range(0, 2**a):
-        z[i] = x[i] - y[i]
+    z._data[:] = x._data - y._data
     asserteq(x-y, z)
     y = random_scalar(a)
     z = +x
@@ -294,8 +312,7 @@ for iter in range(100):
     x = random_multivector(a)
     y = random_multivector(a)
     z = MultiVector(a)
-    for i in range(0, 2**a):
-        z[i] = x[i] - y[i]
+    z._data[:] = x._data - y._data
     asserteq(x-y, z)
     y = random_scalar(a)
     z = -x
@@ -307,31 +324,7 @@ for iter in range(100):
     x = random_multivector(a)
     y = random_multivector(a)
     z = MultiVector(a)
-    for i in x:
-        ii = []
-        bit=1
-        k=1
-        while bit <= i:
-            if bit & i:
-                ii.append(k)
-            k += 1
-            bit *=2
-        for j in y:            
-            jj = []
-            bit = 1
-            k=1
-            while bit <= j:
-                if bit & j:
-                    jj.append(k)
-                k += 1
-                bit *=2
-            l = ii + jj
-            s = signum(l)
-            l = dedup(l)
-            k = 0
-            for kk in l:
-                k += 2**(kk-1)
-            z[k] += s * x[i] * y[j]
+    _gp_reference(x._data, y._data, CAYLEY_SIGN, CAYLEY_IDX, z._data)
     asserteq(x*y, z)        
 
     y = random_scalar(a)
@@ -411,13 +404,58 @@ for iter in range(100):
 
     #test MultiVector.I
     x = random_multivector(a)
-    assert x.I == GA(a).I
-    assert x.I*x.I*x.I*x.I == GA(a).scalar(1)
+    assert x.I == _ga(a).I
+    assert x.I*x.I*x.I*x.I == _ga(a).scalar(1)
     
     #test MultiVector.__str__ TODO
 
     #test MultiVector.__repr__ TODO
 
-
-
-    
+    #test MultiVectorBatch.__mul__, MultiVectorBatch.__rmul__
+    x = random_multivector(a)
+    l = [random_multivector(a) for k in range(5)]
+    b = MultiVectorBatch.from_multivectors(l)
+    assert len(b) == len(l)
+    for (y, z) in zip(b*x, l):
+        asserteq(y, z*x)
+    for (y, z) in zip(x*b, l):
+        asserteq(y, x*z)
+    for (y, z) in zip(2*b, l):
+        asserteq(y, 2*z)
+
+
+# above multivector._TABLE_DIM the product signs are computed per pair of
+# terms instead of read from cached tables; check them against
+# _blade_combine, including operands from different algebras
+for iter in range(20):
+    a = 9 + iter % 2
+    x = random_multivector(a)
+    y = random_multivector(9 + iter % 3 // 2)
+    m = max(x.dim, y.dim)
+    z = MultiVector(m)
+    inner = MultiVector(m)
+    outer = MultiVector(m)
+    for i in x:
+        for j in y:
+            k, s = MultiVector._blade_combine(i, j)
+            s1 = MultiVector._blade_combine(j, i)[1]
+            z[k] += s * x[i] * y[j]
+            inner[k] += (s + s1) / 2 * x[i] * y[j]
+            outer[k] += (s - s1) / 2 * x[i] * y[j]
+    asserteq(x*y, z)
+    asserteq(x@y, inner)
+    asserteq(x&y, outer)
+    z = MultiVector(a)
+    I = (1 << a) - 1
+    for i in x:
+        k, s = MultiVector._blade_combine(i, I)
+        k, s1 = MultiVector._blade_combine(k, I)
+        k, s2 = MultiVector._blade_combine(k, I)
+        z[k] += s * s1 * s2 * x[i]
+    asserteq(x.dual(), z)
+    l = [random_multivector(a) for k in range(5)]
+    b = MultiVectorBatch.from_multivectors(l)
+    for (y, z) in zip(b*x, l):
+        asserteq(y, z*x)
+    for (y, z) in zip(x*b, l):
+        asserteq(y, x*z)
@@ -1,23 +1,52 @@
 from ga import GA
+import functools
 import random
 
+import numpy as np
+
+_rng = np.random.default_rng()
+
+# blade indices are drawn _POOL at a time; _blade_pool[n] = (pool, next)
+_POOL = 1024
+_blade_pool = {}
+
+def seed(s):
+    global _rng
+    random.seed(s)
+    _rng = np.random.default_rng(s)
+    _blade_pool.clear()
+
+@functools.lru_cache(maxsize=None)
+def _ga(n):
+    return GA(n)
+
+@functools.lru_cache(maxsize=None)
+def _zero(n):
+    return _ga(n).scalar(0)
+
 def random_scalar(n=3):
     if random.randint(0,100) < 33:
-        return GA(n).scalar(random.randint(-5, 5))
-    return GA(n).scalar(random.gauss(0, 20))
+        return _ga(n).scalar(random.randint(-5, 5))
+    return _ga(n).scalar(random.gauss(0, 20))
 
 def random_vector(n=3):
     bit = 1
-    x = GA(n).scalar(0)
+    x = +_zero(n)
     while bit < len(x):
         x[bit] = random_scalar(n)
         bit *= 2
     return x
 
+def _blade_index(n):
+    pool, k = _blade_pool.get(n, (None, _POOL))
+    if k == _POOL:
+        pool, k = _rng.integers(0, 1 << n, _POOL), 0
+    _blade_pool[n] = (pool, k + 1)
+    return pool[k]
+
 def random_blade(n=3):
-    x = GA(n).scalar(0)
-    i = random.randint(0, 2**n - 1)
-    x._data[i] = 1.0
+    x = +_zero(n)
+    x._data[_blade_index(n)] = 1.0
     return x
 
 def random_rank(n=3):
@@ -26,11 +55,28 @@ def random_rank(n=3):
 def random_len(n=3):
     if random.randint(0,100) < 2:
         return 0
-    return random.randint(1, 2**n - 1)    
+    return random.randrange(1, 1 << n)    
+
+def _random_data(l, n):
+    # one row per entry of l, with about l[k] nonzero terms in row k,
+    # a third of them small integers
+    dim = 1 << n
+    shape = (len(l), dim)
+    data = _rng.standard_normal(shape)*20
+    ints = _rng.random(shape) < 0.33
+    data[ints] = _rng.integers(-5, 6, np.count_nonzero(ints))
+    data *= _rng.random(shape) < np.reshape(l, (-1, 1))/dim
+    return data
 
 def random_multivector(n=3):
-    x = GA(n).scalar(0)
-    l = random_len()
-    for i  in range(l):
-        x += random_scalar(n)*random_blade(n)
+    x = +_zero(n)
+    x._data[:] = _random_data([random_len()], n)[0]
     return x
+
+def random_multivector_batch(k, n=3):
+    xs = []
+    for row in _random_data([random_len() for i in range(k)], n):
+        x = +_zero(n)
+        x._data[:] = row
+        xs.append(x)
+    return xs
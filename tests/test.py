@@ -1,14 +1,14 @@
 def asserteq(a, b=True):
     if a!=b:
         try:
-            if abs(a - b) > 1E-10:
+            diff = abs(a - b)
+        except:
                 print('a=', a)
                 print('b=', b)
-                print('diff=', abs(a-b))
                 assert(a==b)
-        except:
+        else:
+            if diff > 1E-10:
                 print('a=', a)
                 print('b=', b)
+                print('diff=', diff)
                 assert(a==b)
-
-            